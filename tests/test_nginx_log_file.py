@@ -1,8 +1,17 @@
+import json
+from array import array
 from unittest.mock import mock_open, patch
 
 import pytest
 
-from src.log_analyzer import LogEntry, analyze_logs, parse_log
+from src.log_analyzer import (
+    analyze_logs,
+    configure_logging,
+    get_last_log,
+    group_lines,
+    load_template,
+    render_report,
+)
 
 TEST_LOG_DIR = "../logs"
 TEST_CONFIG = {
@@ -10,26 +19,52 @@ TEST_CONFIG = {
     "LOG_DIR": "../nginx_logs",
     "REPORT_DIR": "../reports",
 }
+MOCK_LOG_DATA = (
+    b"127.0.0.1 - - [01/Jan/2022:00:00:00 +0000] "
+    b"\"GET /test-url HTTP/1.1\" 200 0.123\n"
+    b"127.0.0.1 - - [01/Jan/2022:00:00:01 +0000] "
+    b"\"GET /test-url HTTP/1.1\" 200 0.456\n"
+)
+# lines in the real "ui" format: nginx separates some fields with two spaces,
+# the second line has a trailing space, the third one a tab before the time
+NGINX_LOG_LINES = [
+    b"1.196.116.32 -  - [29/Jun/2017:03:50:22 +0300] "
+    b"\"GET /api/v2/banner/25019354 HTTP/1.1\" 200 927 \"-\" "
+    b"\"Lynx/2.8.8dev.9\" \"-\" \"1498697422-2190034393-4708-9752759\" "
+    b"\"dc7161be3\" 0.390\n",
+    b"1.99.174.176 3b81f63526fa8  - [29/Jun/2017:03:50:22 +0300] "
+    b"\"GET /api/1/photogenic_banners/list/?server_name=WIN7RB4 HTTP/1.1\" "
+    b"200 12 \"-\" \"Python-urllib/2.7\" \"-\" "
+    b"\"1498697422-32900793-4708-9752770\" \"-\" 0.133 \n",
+    b"1.169.137.128 -  - [29/Jun/2017:03:50:22 +0300] "
+    b"\"GET /api/v2/banner/25019354 HTTP/1.1\" 200 19415 \"-\" "
+    b"\"Slotovod\" \"-\" \"1498697422-2118016444-4708-9752769\" "
+    b"\"712e90144abee9\"\t0.199\n",
+]
 
 
 @pytest.fixture
 def mock_log_file():
     """Fixture to create a mock log file"""
-    mock_log_data = (
-        "127.0.0.1 - - [01/Jan/2022:00:00:00 +0000] "
-        "\"GET /test-url HTTP/1.1\" 200 0.123\n"
-        "127.0.0.1 - - [01/Jan/2022:00:00:01 +0000] "
-        "\"GET /test-url HTTP/1.1\" 200 0.456\n"
-    )
-    with patch("builtins.open", mock_open(read_data=mock_log_data)):
+    with patch("builtins.open", mock_open(read_data=MOCK_LOG_DATA)):
         yield
 
 
-def test_parse_log(mock_log_file):
-    """Test parse_log function."""
-    entries = list(parse_log("mock_log_path"))
-    assert len(entries) == 2
-    assert entries[0] == LogEntry(url="/test-url", request_time=0.123)
+def test_group_lines():
+    """Test group_lines function."""
+    url_times = group_lines(MOCK_LOG_DATA.splitlines(keepends=True))
+    assert url_times == {b"/test-url": array("d", [0.123, 0.456])}
+
+
+def test_group_lines_nginx_format():
+    """Test group_lines on double-spaced fields and trailing whitespace."""
+    url_times = group_lines(NGINX_LOG_LINES)
+    assert url_times == {
+        b"/api/v2/banner/25019354": array("d", [0.390, 0.199]),
+        b"/api/1/photogenic_banners/list/?server_name=WIN7RB4": array(
+            "d", [0.133]
+        ),
+    }
 
 
 def test_analyze_logs(mock_log_file):
@@ -39,3 +74,65 @@ def test_analyze_logs(mock_log_file):
     assert report_data[0]["url"] == "/test-url"
     assert report_data[0]["count"] == 2
     assert report_data[0]["time_sum"] == 0.579
+
+
+def test_get_last_log(tmp_path):
+    """Test get_last_log picks the newest dated .gz/.log file."""
+    for name in (
+        "nginx-access-ui.log-20170630.gz",
+        "nginx-access-ui.log-20170701.log",
+        "nginx-access-ui.log-20170629.gz",
+        "nginx-access-ui.log-20170801.bz2",
+        "nginx-access-ui.log-2017abcd.gz",
+    ):
+        (tmp_path / name).touch()
+    assert get_last_log(str(tmp_path)) == str(
+        tmp_path / "nginx-access-ui.log-20170701.log"
+    )
+
+
+def test_get_last_log_empty_dir(tmp_path):
+    """Test get_last_log returns None when there are no logs."""
+    assert get_last_log(str(tmp_path)) is None
+
+
+def test_render_report(tmp_path, monkeypatch):
+    """Test render_report embeds the data whatever the working directory."""
+    load_template.cache_clear()
+    monkeypatch.chdir(tmp_path)
+    data = [{"url": "/test-url", "count": 2, "time_sum": 0.579}]
+    report_path = render_report(data, str(tmp_path))
+
+    with open(report_path, "r") as file:
+        report = file.read()
+    assert "$table_json" not in report
+    table_json = report.split("var table = ", 1)[1].split(";", 1)[0]
+    assert json.loads(table_json) == data
+
+
+def test_render_report_without_placeholder(tmp_path, monkeypatch):
+    """Test render_report writes a template without $table_json as is."""
+    load_template.cache_clear()
+    template_path = tmp_path / "report.html"
+    template_path.write_text("<html></html>")
+    monkeypatch.setattr(
+        "src.log_analyzer.REPORT_TEMPLATE_PATH", str(template_path)
+    )
+    report_path = render_report([{"url": "/test-url"}], str(tmp_path))
+    load_template.cache_clear()
+
+    with open(report_path, "r") as file:
+        assert file.read() == "<html></html>"
+
+
+def test_configure_logging_once(monkeypatch):
+    """Test a repeated configure_logging call does not reconfigure."""
+    monkeypatch.setattr("src.log_analyzer._CONFIGURED", False)
+    with (
+        patch("structlog.configure") as configure,
+        patch("logging.basicConfig") as basic_config,
+    ):
+        configure_logging("base_dir")
+        configure_logging("base_dir", "logs")
+    assert configure.call_count == 1
+    assert basic_config.call_count == 1